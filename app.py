@@ -2,188 +2,302 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import requests
-import difflib
-from chempy import balance_stoichiometry
-from scipy.interpolate import make_interp_spline
-from supabase import create_client, Client
+import httpx
+import asyncio
+import orjson
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote
+from rapidfuzz import process, fuzz
+from estequiometria import EQUACAO_RE, balanceia_reacao
+from supabase import create_client, Client, ClientOptions
+from postgrest.exceptions import APIError
 
 # --- 1. CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(page_title="BioPharm Ultra 2026", layout="wide", page_icon="🧪")
 
 # --- 2. CONEXÃO COM BANCO DE DADOS (SUPABASE) ---
-try:
+AVISO_SEGREDOS = "⚠️ Erro: Configure as chaves do Supabase nas Secrets para ativar o banco em nuvem."
+
+def _segredos_configurados():
+    try:
+        return "SUPABASE_URL" in st.secrets and "SUPABASE_KEY" in st.secrets
+    except FileNotFoundError:  # nenhum secrets.toml encontrado
+        return False
+
+@st.cache_resource
+def conecta_supabase():
+    """Cria um único cliente Supabase por processo, reaproveitado entre reruns e sessões"""
+    if not _segredos_configurados():
+        return None
     url: str = st.secrets["SUPABASE_URL"]
     key: str = st.secrets["SUPABASE_KEY"]
-    supabase: Client = create_client(url, key)
-except Exception:
-    st.error("⚠️ Erro: Configure as chaves do Supabase nas Secrets para ativar o banco em nuvem.")
+    # Timeout curto: o padrão do PostgREST (120 s) travaria o chat se o banco não responder
+    return create_client(url, key, options=ClientOptions(postgrest_client_timeout=10))
+
+# Sem Secrets o app segue funcionando offline; as partes que usam o banco checam `supabase is None`
+supabase: Client | None = conecta_supabase()
+if supabase is None:
+    st.error(AVISO_SEGREDOS)
+
+def _indexa_conhecimento(linhas):
+    """(dicionário pergunta -> resposta, tupla das perguntas) para busca exata em O(1) e fuzzy na tupla"""
+    # As perguntas já chegam em minúsculas (garantido no banco); strip() alinha com a normalização do prompt
+    respostas = {item['pergunta'].strip(): item['resposta'] for item in linhas}
+    return respostas, tuple(respostas)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def carrega_conhecimento():
+    """Carrega a base de conhecimento do Supabase já indexada (cache de 5 min em memória)"""
+    res_db = supabase.table("conhecimento").select("pergunta, resposta").execute()
+    return _indexa_conhecimento(res_db.data)
+
+# Chaveada pelo texto livre do usuário: max_entries limita a memória a 512 perguntas distintas
+@st.cache_data(ttl=300, max_entries=512, show_spinner=False)
+def candidatos_conhecimento(pergunta):
+    """Perguntas mais parecidas com a do usuário, pré-filtradas no Postgres (RPC match_kb / pg_trgm)"""
+    res_db = supabase.rpc("match_kb", {"q": pergunta}).execute()
+    return _indexa_conhecimento(res_db.data)
+
+def limpa_cache_conhecimento():
+    """Invalida os caches da base de conhecimento após um upload, para o chatbot ver os novos itens"""
+    carrega_conhecimento.clear()
+    candidatos_conhecimento.clear()
+
+def busca_conhecimento(pergunta):
+    """Candidatos para o fuzzy match; usa a tabela inteira se a migração do match_kb não foi aplicada"""
+    if supabase is None:
+        return {}, ()
+    try:
+        return candidatos_conhecimento(pergunta)
+    except APIError:
+        return carrega_conhecimento()
 
 # --- 3. FUNÇÕES DE API EXTERNA (PUBCHEM) ---
-def busca_api_pubchem(termo):
-    """Busca dados técnicos em tempo real via API do PubChem"""
+PUBCHEM_URL = "https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{}/property/MolecularFormula,MolecularWeight,IUPACName/JSON"
+
+PUBCHEM_CACHE_TTL = 86400  # 24h: propriedades de um composto praticamente não mudam
+# 1h para os 404 (termo que não é composto, ex. "o que é ph"), guardados com corpo NULL:
+# a mesma pergunta conceitual não volta a gastar o limite de requisições do PubChem a cada mensagem
+PUBCHEM_CACHE_TTL_404 = 3600
+
+# show_spinner=False: chamada no loop do PubChem (inicia_busca_pubchem), thread sem contexto de sessão
+@st.cache_resource(show_spinner=False)
+def _cache_pubchem():
+    """Cache em disco (SQLite) das respostas do PubChem, compartilhado entre reruns e sessões"""
+    con = sqlite3.connect(Path(__file__).with_name("pubchem_cache.sqlite"), check_same_thread=False)
+    con.execute("CREATE TABLE IF NOT EXISTS respostas (url TEXT PRIMARY KEY, corpo BLOB, criado REAL)")
+    return con, threading.Lock()
+
+# Falhas do SQLite (disco somente leitura, banco travado) contam como cache miss e não derrubam o chat
+def _le_cache_pubchem(url_api):
+    """(corpo,) se a URL está no cache e dentro do TTL, com corpo None para um 404; None se não está"""
     try:
-        url_api = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{termo}/property/MolecularFormula,MolecularWeight,IUPACName/JSON"
-        res = requests.get(url_api, timeout=5)
-        if res.status_code == 200:
-            d = res.json()['PropertyTable']['Properties'][0]
-            return {
-                "formula": d.get('MolecularFormula'),
-                "massa": d.get('MolecularWeight'),
-                "nome": d.get('IUPACName')
-            }
-    except:
+        con, trava = _cache_pubchem()
+        with trava:
+            return con.execute(
+                "SELECT corpo FROM respostas WHERE url = ? AND criado > ? - CASE WHEN corpo IS NULL THEN ? ELSE ? END",
+                (url_api, time.time(), PUBCHEM_CACHE_TTL_404, PUBCHEM_CACHE_TTL)).fetchone()
+    except sqlite3.Error:
         return None
 
+def _grava_cache_pubchem(url_api, corpo):
+    try:
+        con, trava = _cache_pubchem()
+        with trava, con:
+            con.execute("INSERT OR REPLACE INTO respostas VALUES (?, ?, ?)", (url_api, corpo, time.time()))
+    except sqlite3.Error:
+        pass
+
+async def _get_com_retentativa(client, url_api, tentativas=3):
+    """GET com backoff exponencial + jitter quando o PubChem sinaliza limite de requisições"""
+    for tentativa in range(tentativas):
+        res = await client.get(url_api)
+        if res.status_code not in (429, 503) or tentativa == tentativas - 1:
+            return res
+        await asyncio.sleep(2 ** tentativa + random.random())
+
+async def busca_api_pubchem_async(termo, client):
+    """Busca dados técnicos de um composto no PubChem usando um cliente httpx compartilhado"""
+    # quote(safe=""): quebras de linha, "/", "?" e "#" do prompt não podem virar parte do caminho da URL
+    url_api = PUBCHEM_URL.format(quote(termo, safe=""))
+    try:
+        linha = _le_cache_pubchem(url_api)
+        em_cache = linha is not None
+        if em_cache:
+            corpo = linha[0]
+            if corpo is None:  # 404 já conhecido
+                return None
+        else:
+            res = await _get_com_retentativa(client, url_api)
+            if res.status_code == 404:
+                _grava_cache_pubchem(url_api, None)
+            if res.status_code != 200:
+                return None
+            corpo = res.content
+        d = orjson.loads(corpo)['PropertyTable']['Properties'][0]
+        if not em_cache:
+            _grava_cache_pubchem(url_api, corpo)
+        return {
+            "formula": d.get('MolecularFormula'),
+            "massa": d.get('MolecularWeight'),
+            "nome": d.get('IUPACName')
+        }
+    except (httpx.HTTPError, httpx.InvalidURL, ValueError, KeyError, IndexError):  # InvalidURL: ex. URL longa demais
+        return None
+
+@st.cache_resource
+def _cliente_pubchem():
+    """Event loop em thread própria com um AsyncClient persistente (conexões reaproveitadas entre reruns)"""
+    # Um AsyncClient fica preso ao loop em que foi usado; com asyncio.run() o loop morre a cada chamada
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    # HTTP/2 multiplexa as consultas do lote numa só conexão TLS; retries= refaz só falhas de conexão
+    # (os 429/503 do PubChem continuam com o backoff de _get_com_retentativa)
+    transporte = httpx.AsyncHTTPTransport(http2=True, retries=2, limits=httpx.Limits(max_keepalive_connections=10))
+    return loop, httpx.AsyncClient(transport=transporte, timeout=5)
+
+async def _busca_pubchem_concorrente(termos, client):
+    return await asyncio.gather(*[busca_api_pubchem_async(t, client) for t in termos])
+
+def busca_api_pubchem_lote(termos):
+    """Busca vários compostos em paralelo (o tempo total é o da consulta mais lenta, não a soma)"""
+    loop, client = _cliente_pubchem()
+    return asyncio.run_coroutine_threadsafe(_busca_pubchem_concorrente(termos, client), loop).result()
+
+def inicia_busca_pubchem(termo):
+    """Dispara a busca no PubChem no loop em segundo plano e devolve o Future sem esperar a resposta"""
+    # O chat cancela o Future quando a base própria responde; result() só é chamado numa falha local
+    loop, client = _cliente_pubchem()
+    return asyncio.run_coroutine_threadsafe(busca_api_pubchem_async(termo.strip().lower(), client), loop)
+
 # --- 4. ESTILIZAÇÃO CSS CUSTOMIZADA ---
-st.markdown("""
+ESTILO_CSS = """
     <style>
     .main-header {
         background: linear-gradient(135deg, #0f172a 0%, #1e3a8a 100%);
         padding: 2rem; border-radius: 15px; color: white; text-align: center; margin-bottom: 2rem;
     }
+    .ptable {
+        display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;
+    }
     .element-card {
         border-radius: 10px; padding: 15px; text-align: center; color: white;
         font-weight: bold; border: 1px solid rgba(255,255,255,0.1); height: 110px;
         box-shadow: 2px 2px 10px rgba(0,0,0,0.1);
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+st.markdown(ESTILO_CSS, unsafe_allow_html=True)
 
 # --- 5. DADOS ESTÁTICOS (TABELA PERIÓDICA) ---
-ELEMENTOS ={
-        "H": {"n": 1, "m": 1.008, "cat": "Não-metal", "cor": "#3b82f6"},
-    "He": {"n": 2, "m": 4.002, "cat": "Gás Nobre", "cor": "#8b5cf6"},
-    "Li": {"n": 3, "m": 6.94, "cat": "Alcalino", "cor": "#f59e0b"},
-    "Be": {"n": 4, "m": 9.012, "cat": "Alcalino-terroso", "cor": "#10b981"},
-    "B": {"n": 5, "m": 10.81, "cat": "Semimetal", "cor": "#06b6d4"},
-    "C": {"n": 6, "m": 12.01, "cat": "Não-metal", "cor": "#3b82f6"},
-    "N": {"n": 7, "m": 14.007, "cat": "Não-metal", "cor": "#3b82f6"},
-    "O": {"n": 8, "m": 15.99, "cat": "Não-metal", "cor": "#3b82f6"},
-    "F": {"n": 9, "m": 18.998, "cat": "Halogênio", "cor": "#f43f5e"},
-    "Ne": {"n": 10, "m": 20.18, "cat": "Gás Nobre", "cor": "#8b5cf6"},
-    "Na": {"n": 11, "m": 22.99, "cat": "Alcalino", "cor": "#f59e0b"},
-    "Mg": {"n": 12, "m": 24.305, "cat": "Alcalino-terroso", "cor": "#10b981"},
-    "Al": {"n": 13, "m": 26.982, "cat": "Outro metal", "cor": "#6b7280"},
-    "Si": {"n": 14, "m": 28.085, "cat": "Semimetal", "cor": "#06b6d4"},
-    "P": {"n": 15, "m": 30.974, "cat": "Não-metal", "cor": "#3b82f6"},
-    "S": {"n": 16, "m": 32.06, "cat": "Não-metal", "cor": "#3b82f6"},
-    "Cl": {"n": 17, "m": 35.45, "cat": "Halogênio", "cor": "#f43f5e"},
-    "Ar": {"n": 18, "m": 39.948, "cat": "Gás Nobre", "cor": "#8b5cf6"},
-    "K": {"n": 19, "m": 39.098, "cat": "Alcalino", "cor": "#f59e0b"},
-    "Ca": {"n": 20, "m": 40.078, "cat": "Alcalino-terroso", "cor": "#10b981"},
-    "Sc": {"n": 21, "m": 44.956, "cat": "Transição", "cor": "#ef4444"},
-    "Ti": {"n": 22, "m": 47.867, "cat": "Transição", "cor": "#ef4444"},
-    "V": {"n": 23, "m": 50.942, "cat": "Transição", "cor": "#ef4444"},
-    "Cr": {"n": 24, "m": 51.996, "cat": "Transição", "cor": "#ef4444"},
-    "Mn": {"n": 25, "m": 54.938, "cat": "Transição", "cor": "#ef4444"},
-    "Fe": {"n": 26, "m": 55.845, "cat": "Transição", "cor": "#ef4444"},
-    "Co": {"n": 27, "m": 58.933, "cat": "Transição", "cor": "#ef4444"},
-    "Ni": {"n": 28, "m": 58.693, "cat": "Transição", "cor": "#ef4444"},
-    "Cu": {"n": 29, "m": 63.546, "cat": "Transição", "cor": "#ef4444"},
-    "Zn": {"n": 30, "m": 65.38, "cat": "Transição", "cor": "#ef4444"},
-    "Ga": {"n": 31, "m": 69.723, "cat": "Outro metal", "cor": "#6b7280"},
-    "Ge": {"n": 32, "m": 72.63, "cat": "Semimetal", "cor": "#06b6d4"},
-    "As": {"n": 33, "m": 74.922, "cat": "Semimetal", "cor": "#06b6d4"},
-    "Se": {"n": 34, "m": 78.971, "cat": "Não-metal", "cor": "#3b82f6"},
-    "Br": {"n": 35, "m": 79.904, "cat": "Halogênio", "cor": "#f43f5e"},
-    "Kr": {"n": 36, "m": 83.798, "cat": "Gás Nobre", "cor": "#8b5cf6"},
-    "Rb": {"n": 37, "m": 85.468, "cat": "Alcalino", "cor": "#f59e0b"},
-    "Sr": {"n": 38, "m": 87.62, "cat": "Alcalino-terroso", "cor": "#10b981"},
-    "Y": {"n": 39, "m": 88.906, "cat": "Transição", "cor": "#ef4444"},
-    "Zr": {"n": 40, "m": 91.224, "cat": "Transição", "cor": "#ef4444"},
-    "Nb": {"n": 41, "m": 92.906, "cat": "Transição", "cor": "#ef4444"},
-    "Mo": {"n": 42, "m": 95.95, "cat": "Transição", "cor": "#ef4444"},
-    "Tc": {"n": 43, "m": 98.0, "cat": "Transição", "cor": "#ef4444"},
-    "Ru": {"n": 44, "m": 101.07, "cat": "Transição", "cor": "#ef4444"},
-    "Rh": {"n": 45, "m": 102.91, "cat": "Transição", "cor": "#ef4444"},
-    "Pd": {"n": 46, "m": 106.42, "cat": "Transição", "cor": "#ef4444"},
-    "Ag": {"n": 47, "m": 107.87, "cat": "Transição", "cor": "#ef4444"},
-    "Cd": {"n": 48, "m": 112.41, "cat": "Transição", "cor": "#ef4444"},
-    "In": {"n": 49, "m": 114.82, "cat": "Outro metal", "cor": "#6b7280"},
-    "Sn": {"n": 50, "m": 118.71, "cat": "Outro metal", "cor": "#6b7280"},
-    "Sb": {"n": 51, "m": 121.76, "cat": "Semimetal", "cor": "#06b6d4"},
-    "Te": {"n": 52, "m": 127.6, "cat": "Semimetal", "cor": "#06b6d4"},
-    "I": {"n": 53, "m": 126.9, "cat": "Halogênio", "cor": "#f43f5e"},
-    "Xe": {"n": 54, "m": 131.29, "cat": "Gás Nobre", "cor": "#8b5cf6"},
-    "Cs": {"n": 55, "m": 132.91, "cat": "Alcalino", "cor": "#f59e0b"},
-    "Ba": {"n": 56, "m": 137.33, "cat": "Alcalino-terroso", "cor": "#10b981"},
-    "La": {"n": 57, "m": 138.91, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Ce": {"n": 58, "m": 140.12, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Pr": {"n": 59, "m": 140.91, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Nd": {"n": 60, "m": 144.24, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Pm": {"n": 61, "m": 145.0, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Sm": {"n": 62, "m": 150.36, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Eu": {"n": 63, "m": 151.96, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Gd": {"n": 64, "m": 157.25, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Tb": {"n": 65, "m": 158.93, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Dy": {"n": 66, "m": 162.5, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Ho": {"n": 67, "m": 164.93, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Er": {"n": 68, "m": 167.26, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Tm": {"n": 69, "m": 168.93, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Yb": {"n": 70, "m": 173.05, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Lu": {"n": 71, "m": 174.97, "cat": "Lantanídeo", "cor": "#ec4899"},
-    "Hf": {"n": 72, "m": 178.49, "cat": "Transição", "cor": "#ef4444"},
-    "Ta": {"n": 73, "m": 180.95, "cat": "Transição", "cor": "#ef4444"},
-    "W": {"n": 74, "m": 183.84, "cat": "Transição", "cor": "#ef4444"},
-    "Re": {"n": 75, "m": 186.21, "cat": "Transição", "cor": "#ef4444"},
-    "Os": {"n": 76, "m": 190.23, "cat": "Transição", "cor": "#ef4444"},
-    "Ir": {"n": 77, "m": 192.22, "cat": "Transição", "cor": "#ef4444"},
-    "Pt": {"n": 78, "m": 195.08, "cat": "Transição", "cor": "#ef4444"},
-    "Au": {"n": 79, "m": 196.97, "cat": "Transição", "cor": "#ef4444"},
-    "Hg": {"n": 80, "m": 200.59, "cat": "Transição", "cor": "#ef4444"},
-    "Tl": {"n": 81, "m": 204.38, "cat": "Outro metal", "cor": "#6b7280"},
-    "Pb": {"n": 82, "m": 207.2, "cat": "Outro metal", "cor": "#6b7280"},
-    "Bi": {"n": 83, "m": 208.98, "cat": "Outro metal", "cor": "#6b7280"},
-    "Po": {"n": 84, "m": 209.0, "cat": "Semimetal", "cor": "#06b6d4"},
-    "At": {"n": 85, "m": 210.0, "cat": "Halogênio", "cor": "#f43f5e"},
-    "Rn": {"n": 86, "m": 222.0, "cat": "Gás Nobre", "cor": "#8b5cf6"},
-    "Fr": {"n": 87, "m": 223.0, "cat": "Alcalino", "cor": "#f59e0b"},
-    "Ra": {"n": 88, "m": 226.0, "cat": "Alcalino-terroso", "cor": "#10b981"},
-    "Ac": {"n": 89, "m": 227.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Th": {"n": 90, "m": 232.04, "cat": "Actinídeo", "cor": "#f97316"},
-    "Pa": {"n": 91, "m": 231.04, "cat": "Actinídeo", "cor": "#f97316"},
-    "U": {"n": 92, "m": 238.03, "cat": "Actinídeo", "cor": "#f97316"},
-    "Np": {"n": 93, "m": 237.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Pu": {"n": 94, "m": 244.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Am": {"n": 95, "m": 243.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Cm": {"n": 96, "m": 247.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Bk": {"n": 97, "m": 247.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Cf": {"n": 98, "m": 251.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Es": {"n": 99, "m": 252.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Fm": {"n": 100, "m": 257.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Md": {"n": 101, "m": 258.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "No": {"n": 102, "m": 259.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Lr": {"n": 103, "m": 266.0, "cat": "Actinídeo", "cor": "#f97316"},
-    "Rf": {"n": 104, "m": 267.0, "cat": "Transição", "cor": "#ef4444"},
-    "Db": {"n": 105, "m": 268.0, "cat": "Transição", "cor": "#ef4444"},
-    "Sg": {"n": 106, "m": 271.0, "cat": "Transição", "cor": "#ef4444"},
-    "Bh": {"n": 107, "m": 270.0, "cat": "Transição", "cor": "#ef4444"},
-    "Hs": {"n": 108, "m": 277.0, "cat": "Transição", "cor": "#ef4444"},
-    "Mt": {"n": 109, "m": 278.0, "cat": "Transição", "cor": "#ef4444"},
-    "Ds": {"n": 110, "m": 281.0, "cat": "Transição", "cor": "#ef4444"},
-    "Rg": {"n": 111, "m": 282.0, "cat": "Transição", "cor": "#ef4444"},
-    "Cn": {"n": 112, "m": 285.0, "cat": "Transição", "cor": "#ef4444"},
-    "Nh": {"n": 113, "m": 286.0, "cat": "Outro metal", "cor": "#6b7280"},
-    "Fl": {"n": 114, "m": 289.0, "cat": "Outro metal", "cor": "#6b7280"},
-    "Mc": {"n": 115, "m": 290.0, "cat": "Outro metal", "cor": "#6b7280"},
-    "Lv": {"n": 116, "m": 293.0, "cat": "Outro metal", "cor": "#6b7280"},
-    "Ts": {"n": 117, "m": 294.0, "cat": "Halogênio", "cor": "#f43f5e"},
-    "Og": {"n": 118, "m": 294.0, "cat": "Gás Nobre", "cor": "#8b5cf6"},
-    "Uue": {"n": 119, "m": 315.0, "cat": "Alcalino", "cor": "#f59e0b"},
-    "Ubn": {"n": 120, "m": 320.0, "cat": "Alcalino-terroso", "cor": "#10b981"},
-    "Ubu": {"n": 121, "m": 326.0, "cat": "Superpesado", "cor": "#7c3aed"},
-    "Ubb": {"n": 122, "m": 328.0, "cat": "Superpesado", "cor": "#7c3aed"},
-    "Ubt": {"n": 123, "m": 330.0, "cat": "Superpesado", "cor": "#7c3aed"},
-    "Ubq": {"n": 124, "m": 332.0, "cat": "Superpesado", "cor": "#7c3aed"},
-    "Ubp": {"n": 125, "m": 334.0, "cat": "Superpesado", "cor": "#7c3aed"},
-    "Ubh": {"n": 126, "m": 336.0, "cat": "Superpesado", "cor": "#7c3aed"},
-    "Ubs": {"n": 127, "m": 338.0, "cat": "Superpesado", "cor": "#7c3aed"}
+# A cor do card depende só da categoria: guardada uma vez aqui, e não repetida em cada elemento
+CORES_CATEGORIA = {
+    "Não-metal": "#3b82f6", "Gás Nobre": "#8b5cf6", "Alcalino": "#f59e0b", "Alcalino-terroso": "#10b981",
+    "Semimetal": "#06b6d4", "Halogênio": "#f43f5e", "Outro metal": "#6b7280", "Transição": "#ef4444",
+    "Lantanídeo": "#ec4899", "Actinídeo": "#f97316", "Superpesado": "#7c3aed",
 }
-# --- 6. HEADER PRINCIPAL ---
-st.markdown('<div class="main-header"><h1>BioPharm Ultra 2026</h1><p>Sistema Unificado: Banco de Dados, APIs e Cálculos Avançados</p></div>', unsafe_allow_html=True)
 
-# --- 7. NAVEGAÇÃO POR ABAS ---
+# cache_resource: a tabela é só lida, então todas as sessões compartilham o mesmo DataFrame
+# em vez de receber, a cada rerun, uma cópia desserializada (como faria o cache_data)
+@st.cache_resource
+def tabela_elementos():
+    """Tabela periódica em formato colunar (DataFrame indexado pelo símbolo), lida de elementos.json"""
+    dados = orjson.loads(Path(__file__).with_name("elementos.json").read_bytes())
+    df = pd.DataFrame.from_dict(dados, orient="index")
+    # n cabe em uint8 (1..127) e cat vira categórica (códigos int8 que indexam CORES_CATEGORIA)
+    df = df.astype({"n": np.uint8, "m": np.float32, "cat": pd.CategoricalDtype(list(CORES_CATEGORIA))})
+    # Categoria fora de CORES_CATEGORIA vira NaN (código -1), e paleta[-1] pintaria o card com a cor errada
+    faltando = df.index[df["cat"].isna()]
+    if len(faltando):
+        raise ValueError(f"Categoria sem cor em CORES_CATEGORIA para: {', '.join(faltando)}")
+    return df
+
+@st.cache_data
+def grade_elementos_html():
+    """HTML da tabela periódica inteira (cards em CSS grid), montado uma única vez"""
+    df = tabela_elementos()
+    paleta = tuple(CORES_CATEGORIA.values())
+    cards = "".join(
+        f'<div class="element-card" style="background:{paleta[c]}">{n}<br><span style="font-size:24px">{simb}</span><br><small>{m!s}</small></div>'
+        for simb, n, m, c in zip(df.index, df["n"].to_numpy(), df["m"].to_numpy(), df["cat"].cat.codes.to_numpy())
+    )
+    return f'<div class="ptable">{cards}</div>'
+
+# --- 6. FUNÇÕES DE CÁLCULO (ESTEQUIOMETRIA E SOLUBILIDADE) ---
+# Estequiometria em estequiometria.py (funções puras, testadas sem subir o Streamlit); aqui só o cache
+balanceia_reacao = st.cache_data(balanceia_reacao)
+
+def _lista_numeros(texto):
+    """Converte "0, 20, 40" em array; ValueError se algum item não for número"""
+    # Conversão única em C; ao contrário do np.fromstring, que para no primeiro item inválido e devolve o que
+    # leu até ali, aqui " 4O" ou o item vazio de uma vírgula sobrando ("0, 20,") levantam ValueError
+    return np.array(texto.split(","), dtype=np.float64)
+
+@st.cache_data
+def suaviza_curva(temp, sol, spline=None, n=300):
+    """Curva em n pontos a partir das listas "0, 20, 40" digitadas no editor
+
+    Por padrão a interpolação é linear (np.interp), que em 300 pontos já fica visualmente suave.
+    spline="Catmull-Rom" ou "Cúbica natural" usa o kernel Numba correspondente de interpolacao.py.
+    """
+    x = _lista_numeros(temp)
+    y = _lista_numeros(sol)
+    if x.size < 3 or x.size != y.size:
+        raise ValueError("São necessários ao menos 3 pares temperatura/solubilidade")
+    if np.any(np.diff(x) <= 0):
+        raise ValueError("As temperaturas devem estar em ordem crescente")
+    x_smooth = np.linspace(x[0], x[-1], n)
+    if spline is None:
+        return x_smooth, np.interp(x_smooth, x, y)
+    # Import só quando a spline é pedida: evita carregar o Numba na abertura do app
+    from interpolacao import catmull_rom, spline_cubica_natural
+    kernel = spline_cubica_natural if spline == "Cúbica natural" else catmull_rom
+    return x_smooth, kernel(x, y, x_smooth)
+
+def novo_grafico_solubilidade():
+    """Figura Plotly vazia, só com o layout do gráfico de solubilidade"""
+    fig = go.Figure()
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        xaxis=dict(title="Temperatura (°C)", gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(title="g/100g H2O", gridcolor='rgba(255,255,255,0.1)'),
+        legend=dict(bgcolor='rgba(0,0,0,0)'),
+        hovermode="x unified"
+    )
+    return fig
+
+def atualiza_curvas(fig, curvas, spline=None):
+    """Atualiza no lugar os traços da figura com as curvas (nome, cor, temperaturas, solubilidades)
+
+    Curvas com dados inválidos (menos de 3 pontos, valor não numérico...) ficam de fora uma a uma,
+    sem derrubar o gráfico das outras; os nomes delas são devolvidos.
+    """
+    validas, ignoradas = [], []
+    for nome, cor, temp, sol in curvas:
+        try:
+            validas.append((nome, cor, *suaviza_curva(temp, sol, spline)))
+        except ValueError:
+            ignoradas.append(str(nome))
+    with fig.batch_update():
+        if len(fig.data) != len(validas):
+            fig.data = []
+            for _ in validas:
+                fig.add_trace(go.Scatter(line=dict(width=3)))
+        for trace, (nome, cor, x_smooth, y_smooth) in zip(fig.data, validas):
+            trace.update(x=x_smooth, y=y_smooth, name=nome, line_color=cor)
+    return ignoradas
+
+# --- 7. HEADER PRINCIPAL ---
+CABECALHO_HTML = '<div class="main-header"><h1>BioPharm Ultra 2026</h1><p>Sistema Unificado: Banco de Dados, APIs e Cálculos Avançados</p></div>'
+st.markdown(CABECALHO_HTML, unsafe_allow_html=True)
+
+# --- 8. NAVEGAÇÃO POR ABAS ---
 tabs = st.tabs(["💬 Chatbot Híbrido", "💎 Tabelas Químicas", "⚖️ Estequiometria & 3D", "📈 Gráficos de Solubilidade"," +/- Calculadora Química" ,"⚙️ Admin (Upload)"])
 
 # --- ABA 1: CHATBOT (SUPABASE + PUBCHEM) ---
@@ -199,20 +313,28 @@ with tabs[0]:
         
         resposta = "Não encontrei informações sobre isso."
         
-        # 1ª Tentativa: Banco de Dados Próprio (Supabase)
+        # O PubChem já começa em segundo plano enquanto a base própria é consultada;
+        # se ela responder, a consulta ao PubChem é cancelada sem ser esperada
+        chave = prompt.lower().strip()
+        busca_api = inicia_busca_pubchem(prompt)
         try:
-            res_db = supabase.table("conhecimento").select("pergunta, resposta").execute()
-            dados_locais = {item['pergunta']: item['resposta'] for item in res_db.data}
-            matches = difflib.get_close_matches(prompt.lower(), dados_locais.keys(), n=1, cutoff=0.6)
-            if matches:
-                resposta = dados_locais[matches[0]]
+            respostas, perguntas = busca_conhecimento(chave)
+            # 1ª Tentativa: Banco de Dados Próprio (Supabase), primeiro a pergunta exata e só depois o fuzzy
+            if chave in respostas:
+                resposta = respostas[chave]
+            # fuzz.ratio com corte 60 equivale ao antigo difflib (cutoff=0.6); WRatio pontua trechos parciais
+            # e casaria "aspirina" com a dose de dipirona
+            elif match := process.extractOne(chave, perguntas, scorer=fuzz.ratio, score_cutoff=60):
+                resposta = respostas[match[0]]
             else:
-                # 2ª Tentativa: API Externa (PubChem)
-                dados_api = busca_api_pubchem(prompt)
+                # 2ª Tentativa: API Externa (PubChem), só aqui esperamos a resposta
+                dados_api = busca_api.result()
                 if dados_api:
                     resposta = f"🔍 **Resultado via API PubChem:**\n\n**Nome:** {dados_api['nome']}\n\n**Fórmula:** {dados_api['formula']}\n\n**Massa Molar:** {dados_api['massa']} g/mol"
-        except:
+        except (APIError, httpx.HTTPError):
             resposta = "Erro ao conectar aos serviços de dados."
+        finally:
+            busca_api.cancel()  # sem efeito se já terminou; senão descarta a consulta que não será usada
 
         st.session_state.messages.append({"role": "assistant", "content": resposta})
         with st.chat_message("assistant"): st.write(resposta)
@@ -221,11 +343,11 @@ with tabs[0]:
 with tabs[1]:
     modo_tab = st.radio("Selecione:", ["Tabela Periódica", "Kps (Solubilidade)"], horizontal=True)
     if modo_tab == "Tabela Periódica":
-        cols = st.columns(4)
-        for i, (simb, info) in enumerate(ELEMENTOS.items()):
-            with cols[i % 4]:
-                st.markdown(f'<div class="element-card" style="background:{info["cor"]}">{info["n"]}<br><span style="font-size:24px">{simb}</span><br><small>{info["m"]}</small></div>', unsafe_allow_html=True)
-                st.button(f"Detalhes {simb}", key=f"btn_{simb}", on_click=lambda s=simb: st.toast(f"Categoria: {ELEMENTOS[s]['cat']}"))
+        df_elem = tabela_elementos()
+        simb = st.selectbox("Detalhes do elemento:", df_elem.index)
+        st.info(f"**{simb}** · Nº atômico {df_elem.at[simb, 'n']} · Massa {df_elem.at[simb, 'm']!s} · Categoria: {df_elem.at[simb, 'cat']}")
+        # Um único st.markdown com todos os cards em CSS grid, em vez de um componente por elemento
+        st.markdown(grade_elementos_html(), unsafe_allow_html=True)
     else:
         df_kps = pd.DataFrame([["AgCl", "1,6 x 10⁻¹⁰"], ["BaSO₄", "1,1 x 10⁻¹⁰"], ["CaCO₃", "3,36 x 10⁻⁹"],["PbBr₂", "7,9 x 10⁻⁵"],["CuBr", "4,2 x 10⁻⁸"],["AgBr", "7,7 x 10⁻¹³"],["Al(OH)₃", "1,1 x 10⁻³³"],["Fe(OH)₃", "4 x 10⁻³⁸"],["Mg(OH)₂", "1,8 x 10⁻¹¹"]], columns=["Fórmula", "Kps"])
         st.table(df_kps)
@@ -235,13 +357,13 @@ with tabs[2]:
     st.subheader("Balanceamento de Reações")
     reacao_input = st.text_input("Insira a reação (Ex: H2 + O2 -> H2O)")
     if st.button("Executar Balanço"):
-        try:
-            reag, prod = reacao_input.split("->")
-            r_list = [x.strip() for x in reag.split("+")]
-            p_list = [x.strip() for x in prod.split("+")]
-            reac_bal, prod_bal = balance_stoichiometry(r_list, p_list)
-            st.success(f"Equação Balanceada: {dict(reac_bal)} -> {dict(prod_bal)}")
-        except: st.error("Erro na sintaxe da equação. Use 'A + B -> C'.")
+        if not EQUACAO_RE.match(reacao_input):
+            st.error("Erro na sintaxe da equação. Use 'A + B -> C'.")
+        else:
+            try:
+                reac_bal, prod_bal = balanceia_reacao(reacao_input)
+                st.success(f"Equação Balanceada: {reac_bal} -> {prod_bal}")
+            except ValueError as e: st.error(f"Não foi possível balancear: {e}")
     
     st.divider()
     st.subheader("Visualizador Molecular 3D (API)")
@@ -250,71 +372,65 @@ with tabs[2]:
         st.link_button(f"Abrir {comp_3d} no PubChem 3D", f"https://pubchem.ncbi.nlm.nih.gov/#query={comp_3d}")
 
 # --- ABA 4: GRÁFICOS (PLOTLY) ---
-    with tabs[3]:
-        st.subheader("Comparação de Curvas de Solubilidade")
-    
-        if 'sais' not in st.session_state:
-            st.session_state.sais = [
-                {"nome": "KNO3", "temp": "0, 20, 40, 60, 80", "sol": "13, 32, 64, 110, 169", "cor": "#10b981"},
-                {"nome": "NaCl", "temp": "0, 20, 40, 60, 80", "sol": "35, 36, 37, 38, 39", "cor": "#3b82f6"}
-            ]
+with tabs[3]:
+    st.subheader("Comparação de Curvas de Solubilidade")
 
-        c1, c2 = st.columns([1, 2])
+    if 'sais' not in st.session_state:
+        st.session_state.sais = [
+            {"nome": "KNO3", "temp": "0, 20, 40, 60, 80", "sol": "13, 32, 64, 110, 169", "cor": "#10b981"},
+            {"nome": "NaCl", "temp": "0, 20, 40, 60, 80", "sol": "35, 36, 37, 38, 39", "cor": "#3b82f6"}
+        ]
 
-        with c1:
-            st.markdown("### 🛠️ Configurar Sais")
-            df_sais = st.data_editor(st.session_state.sais, num_rows="dynamic", key="editor_sais")
-        
-        # Botão para baixar os dados em CSV
-        import pandas as pd
-        csv = pd.DataFrame(df_sais).to_csv(index=False).encode('utf-8')
-        st.download_button(
-                label="📥 Baixar Dados (CSV)",
-                data=csv,
-                file_name='curvas_solubilidade.csv',
-                mime='text/csv',
-            )
+    c1, c2 = st.columns([1, 2])
 
-        with c2:
-            try:
-                fig = go.Figure()
-                for sal in df_sais:
-                    x = np.array([float(i) for i in sal["temp"].split(",")])
-                    y = np.array([float(i) for i in sal["sol"].split(",")])
-                    x_smooth = np.linspace(x.min(), x.max(), 300)
-                    y_smooth = make_interp_spline(x, y, k=2)(x_smooth)
-                
-                    fig.add_trace(go.Scatter(
-                        x=x_smooth, y=y_smooth, name=sal["nome"],
-                        line=dict(color=sal["cor"], width=3)
-                    ))
-
-                fig.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    xaxis=dict(title="Temperatura (°C)", gridcolor='rgba(255,255,255,0.1)'),
-                    yaxis=dict(title="g/100g H2O", gridcolor='rgba(255,255,255,0.1)'),
-                    legend=dict(bgcolor='rgba(0,0,0,0)'),
-                    hovermode="x unified"
-                )
+    with c1:
+        st.markdown("### 🛠️ Configurar Sais")
+        df_sais = st.data_editor(st.session_state.sais, num_rows="dynamic", key="editor_sais")
+        spline = None
+        if st.checkbox("Suavização spline", value=False):
+            spline = st.radio("Tipo de spline", ["Catmull-Rom", "Cúbica natural"], horizontal=True)
+
+    # Botão para baixar os dados em CSV
+    csv = pd.DataFrame(df_sais).to_csv(index=False).encode('utf-8')
+    st.download_button(
+        label="📥 Baixar Dados (CSV)",
+        data=csv,
+        file_name='curvas_solubilidade.csv',
+        mime='text/csv',
+    )
+
+    with c2:
+        try:
+            # Linhas recém-adicionadas no editor chegam vazias: ficam de fora até serem preenchidas
+            curvas = tuple((sal["nome"], sal["cor"], sal["temp"], sal["sol"]) for sal in df_sais if sal["temp"] and sal["sol"])
+            # A figura vive na sessão; só os traços são recalculados quando os dados do editor mudam
+            if "fig_sol" not in st.session_state:
+                st.session_state.fig_sol = novo_grafico_solubilidade()
+                st.session_state.curvas_sol = None
+                st.session_state.ignoradas_sol = []
+            if st.session_state.curvas_sol != (curvas, spline):
+                st.session_state.ignoradas_sol = atualiza_curvas(st.session_state.fig_sol, curvas, spline)
+                st.session_state.curvas_sol = (curvas, spline)
+            fig = st.session_state.fig_sol
 
             # Configuração para permitir o download da imagem pelo menu do gráfico
-                config = {
-                    'toImageButtonOptions': {
-                        'format': 'png', # ou 'jpeg', 'svg', 'pdf'
-                        'filename': 'grafico_solubilidade',
-                        'height': 500,
-                        'width': 700,
-                        'scale': 1 # Resolução da imagem
-                    }
+            config = {
+                'toImageButtonOptions': {
+                    'format': 'png', # ou 'jpeg', 'svg', 'pdf'
+                    'filename': 'grafico_solubilidade',
+                    'height': 500,
+                    'width': 700,
+                    'scale': 1 # Resolução da imagem
                 }
+            }
 
-                st.plotly_chart(fig, use_container_width=True, config=config)
-                st.caption("📸 Use a câmera no canto superior direito do gráfico para baixar como PNG.")
+            st.plotly_chart(fig, use_container_width=True, config=config, key="sol_chart")
+            st.caption("📸 Use a câmera no canto superior direito do gráfico para baixar como PNG.")
+            if st.session_state.ignoradas_sol:
+                st.caption(f"⚠️ Fora do gráfico (dados inválidos ou menos de 3 pontos): {', '.join(st.session_state.ignoradas_sol)}")
 
-            except Exception as e:
-                st.warning("Verifique o formato dos dados (ex: 10, 20, 30)")
+        except Exception as e:
+            st.warning("Verifique o formato dos dados (ex: 10, 20, 30)")
 
 # ---  calc---
 with tabs[4]:
@@ -380,10 +496,29 @@ with tabs[5]:
         pergunta_n = st.text_input("Pergunta ou Conceito:")
         resposta_n = st.text_area("Resposta Detalhada:")
         if st.form_submit_button("Fazer Upload para Nuvem"):
-            if pergunta_n and resposta_n:
+            if supabase is None: st.error(AVISO_SEGREDOS)
+            elif pergunta_n and resposta_n:
                 try:
                     supabase.table("conhecimento").insert({"pergunta": pergunta_n.lower(), "resposta": resposta_n}).execute()
+                    limpa_cache_conhecimento()
                     st.success("✅ Conhecimento integrado com sucesso!")
-                except Exception as e: st.error(f"Erro ao salvar: {e}")
+                except (APIError, httpx.HTTPError) as e: st.error(f"Erro ao salvar: {e}")
             else: st.warning("Preencha todos os campos.")
-                
+
+    st.markdown("### 📤 Upload em Lote (CSV)")
+    arquivo_csv = st.file_uploader("CSV com as colunas pergunta,resposta", type="csv")
+    if arquivo_csv is not None and st.button("Enviar CSV para Nuvem"):
+        if supabase is None:
+            st.error(AVISO_SEGREDOS)
+        else:
+            try:
+                df_kb = pd.read_csv(arquivo_csv, dtype=str)[["pergunta", "resposta"]].dropna()
+            except (ValueError, KeyError):
+                st.warning("O CSV precisa ter as colunas 'pergunta' e 'resposta'.")
+            else:
+                try:
+                    # Uma única requisição para todas as linhas
+                    supabase.table("conhecimento").insert(df_kb.assign(pergunta=df_kb.pergunta.str.lower()).to_dict("records")).execute()
+                    limpa_cache_conhecimento()
+                    st.success(f"✅ {len(df_kb)} itens integrados com sucesso!")
+                except (APIError, httpx.HTTPError) as e: st.error(f"Erro ao salvar: {e}")
@@ -0,0 +1,15 @@
+"""Compila antecipadamente (AOT) os kernels de interpolação em interpolacao_aot.*.so
+
+Uso no deploy: python compila_interpolacao.py
+Sem o módulo compilado, interpolacao.py cai para o JIT do Numba (compilação na primeira importação).
+"""
+from numba.pycc import CC
+
+import interpolacao
+
+cc = CC("interpolacao_aot")
+cc.export("catmull_rom", interpolacao.ASSINATURA)(interpolacao._catmull_rom)
+cc.export("spline_cubica_natural", interpolacao.ASSINATURA)(interpolacao._spline_cubica_natural)
+
+if __name__ == "__main__":
+    cc.compile()
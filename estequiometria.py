@@ -0,0 +1,72 @@
+import re
+from fractions import Fraction
+from functools import lru_cache
+from math import gcd, lcm
+
+import numpy as np
+
+# Parser de fórmulas e balanceamento de reações da aba de estequiometria.
+# Funções puras, fora do app.py: podem ser importadas (e testadas) sem executar o script do Streamlit.
+# O cache por reação (st.cache_data) é aplicado no app.py.
+
+_TOKEN_FORMULA = re.compile(r"([A-Z][a-z]?)(\d*)|(\()|(\))(\d*)")
+# Validação barata da forma da equação ("A + B -> C") antes de chamar o solver. O regex não conta parênteses
+# aninhados (ex.: "Fe4(Fe(CN)6)3"); a fórmula de cada espécie é conferida por composicao(), com ValueError
+_ESPECIE = r"[A-Z(][A-Za-z\d()]*"
+EQUACAO_RE = re.compile(rf"^\s*{_ESPECIE}(?:\s*\+\s*{_ESPECIE})*\s*->\s*{_ESPECIE}(?:\s*\+\s*{_ESPECIE})*\s*$")
+
+@lru_cache(maxsize=4096)
+def composicao(formula):
+    """Conta os átomos de cada elemento de uma fórmula, ex.: "Ca(OH)2" -> (("Ca", 1), ("O", 2), ("H", 2))"""
+    pilha = [{}]
+    pos = 0
+    for tok in _TOKEN_FORMULA.finditer(formula):
+        if tok.start() != pos:
+            raise ValueError(f"Fórmula inválida: {formula}")
+        pos = tok.end()
+        el, n, abre, fecha, mult = tok.groups()
+        if el:
+            pilha[-1][el] = pilha[-1].get(el, 0) + int(n or 1)
+        elif abre:
+            pilha.append({})
+        else:
+            if len(pilha) == 1:
+                raise ValueError(f"Parênteses desbalanceados: {formula}")
+            grupo = pilha.pop()
+            for el, n in grupo.items():
+                pilha[-1][el] = pilha[-1].get(el, 0) + n * int(mult or 1)
+    if pos != len(formula) or len(pilha) != 1 or not pilha[0]:
+        raise ValueError(f"Fórmula inválida: {formula}")
+    return tuple(pilha[0].items())
+
+def balanceia_reacao(reacao):
+    """Balanceia "A + B -> C" pelo núcleo (nullspace) da matriz de composição elementos x espécies"""
+    from scipy.linalg import null_space  # import tardio: só pago no primeiro balanceamento
+
+    reag, prod = reacao.split("->")
+    r_list = [x.strip() for x in reag.split("+")]
+    p_list = [x.strip() for x in prod.split("+")]
+    especies = r_list + p_list
+    comps = [dict(composicao(e)) for e in especies]
+    elementos = sorted(set().union(*comps))
+    # Reagentes entram com sinal positivo e produtos com negativo: M @ coeficientes = 0
+    M = np.array([[c.get(el, 0) for c in comps] for el in elementos])
+    M[:, len(r_list):] *= -1
+
+    ns = null_space(M)
+    if ns.shape[1] == 0:
+        raise ValueError("A reação não pode ser balanceada")
+    if ns.shape[1] > 1:
+        raise ValueError("A reação não possui um balanceamento único")
+    v = ns[:, 0] / ns[np.argmax(np.abs(ns[:, 0])), 0]
+    if np.any(v <= 1e-9):
+        raise ValueError("A reação não pode ser balanceada com coeficientes positivos")
+
+    fracoes = [Fraction(float(c)).limit_denominator(1000) for c in v]
+    mmc = lcm(*(f.denominator for f in fracoes))
+    coefs = [int(f * mmc) for f in fracoes]
+    divisor = gcd(*coefs)
+    coefs = [c // divisor for c in coefs]
+    if np.any(M @ np.array(coefs)):
+        raise ValueError("Não foi possível encontrar coeficientes inteiros")
+    return dict(zip(r_list, coefs[:len(r_list)])), dict(zip(p_list, coefs[len(r_list):]))
@@ -0,0 +1,81 @@
+import numpy as np
+from numba import njit
+
+# Kernels de interpolação das curvas de solubilidade.
+# Ficam fora do app.py porque o Streamlit reexecuta o script a cada interação:
+# aqui o módulo é importado uma vez e o código compilado pelo Numba é reaproveitado.
+# As versões em Python puro abaixo são compiladas antecipadamente por compila_interpolacao.py
+# (módulo interpolacao_aot) ou, se ele não existir, pelo JIT no fim deste arquivo.
+
+ASSINATURA = "f8[::1](f8[::1], f8[::1], f8[::1])"
+
+def _catmull_rom(x, y, xs):
+    """Spline de Catmull-Rom (Hermite cúbica local) de (x, y) avaliada em xs; x e xs em ordem crescente"""
+    n = x.size
+    out = np.empty_like(xs)
+    j = 0
+    for i in range(xs.size):
+        t = xs[i]
+        while j < n - 2 and t > x[j + 1]:
+            j += 1
+        h = x[j + 1] - x[j]
+        # Tangentes por diferença centrada nos pontos internos e unilateral nas pontas
+        if j == 0:
+            m0 = (y[1] - y[0]) / (x[1] - x[0])
+        else:
+            m0 = (y[j + 1] - y[j - 1]) / (x[j + 1] - x[j - 1])
+        if j == n - 2:
+            m1 = (y[n - 1] - y[n - 2]) / (x[n - 1] - x[n - 2])
+        else:
+            m1 = (y[j + 2] - y[j]) / (x[j + 2] - x[j])
+        s = (t - x[j]) / h
+        s2 = s * s
+        s3 = s2 * s
+        out[i] = ((2 * s3 - 3 * s2 + 1) * y[j] + (s3 - 2 * s2 + s) * h * m0
+                  + (-2 * s3 + 3 * s2) * y[j + 1] + (s3 - s2) * h * m1)
+    return out
+
+def _spline_cubica_natural(x, y, xs):
+    """Spline cúbica natural de (x, y) avaliada em xs; x e xs em ordem crescente"""
+    n = x.size
+    h = np.diff(x)
+    # Segundas derivadas M (M[0] = M[n-1] = 0) pelo algoritmo de Thomas no sistema tridiagonal
+    M = np.zeros(n)
+    c = np.zeros(n)
+    d = np.zeros(n)
+    for i in range(1, n - 1):
+        diag = 2.0 * (h[i - 1] + h[i]) - h[i - 1] * c[i - 1]
+        c[i] = h[i] / diag
+        d[i] = (6.0 * ((y[i + 1] - y[i]) / h[i] - (y[i] - y[i - 1]) / h[i - 1]) - h[i - 1] * d[i - 1]) / diag
+    for i in range(n - 2, 0, -1):
+        M[i] = d[i] - c[i] * M[i + 1]
+
+    out = np.empty_like(xs)
+    j = 0
+    for i in range(xs.size):
+        while j < n - 2 and xs[i] > x[j + 1]:
+            j += 1
+        t = xs[i] - x[j]
+        b = (y[j + 1] - y[j]) / h[j] - h[j] * (2.0 * M[j] + M[j + 1]) / 6.0
+        out[i] = y[j] + t * (b + t * (M[j] / 2.0 + t * (M[j + 1] - M[j]) / (6.0 * h[j])))
+    return out
+
+try:
+    from interpolacao_aot import catmull_rom as _catmull_rom_c, spline_cubica_natural as _spline_cubica_natural_c
+except ImportError:
+    # Com assinatura explícita o Numba compila já na importação, e não no primeiro gráfico
+    _catmull_rom_c = njit(ASSINATURA, cache=True, fastmath=True)(_catmull_rom)
+    _spline_cubica_natural_c = njit(ASSINATURA, cache=True, fastmath=True)(_spline_cubica_natural)
+
+def _contiguos(*arrays):
+    # A assinatura f8[::1] exige arrays contíguos: o JIT recusa os demais com TypeError e o módulo AOT
+    # os leria como se fossem contíguos (resultado errado); a cópia só acontece quando necessária
+    return [np.ascontiguousarray(a, dtype=np.float64) for a in arrays]
+
+def catmull_rom(x, y, xs):
+    """Spline de Catmull-Rom de (x, y) avaliada em xs, com o kernel compilado"""
+    return _catmull_rom_c(*_contiguos(x, y, xs))
+
+def spline_cubica_natural(x, y, xs):
+    """Spline cúbica natural de (x, y) avaliada em xs, com o kernel compilado"""
+    return _spline_cubica_natural_c(*_contiguos(x, y, xs))
@@ -0,0 +1,17 @@
+-- Busca por similaridade da base de conhecimento do chatbot, feita no Postgres.
+-- O app envia a pergunta e recebe só os K candidatos mais parecidos, em vez da tabela inteira.
+create extension if not exists pg_trgm;
+
+create index if not exists conhecimento_pergunta_trgm_idx
+    on conhecimento using gin (pergunta gin_trgm_ops);
+
+create or replace function match_kb(q text, k int default 50)
+returns table (pergunta text, resposta text, score real)
+language sql stable
+as $$
+    select c.pergunta, c.resposta, similarity(c.pergunta, q) as score
+    from conhecimento c
+    where c.pergunta % q
+    order by score desc
+    limit k;
+$$;
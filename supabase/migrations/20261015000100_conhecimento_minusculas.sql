@@ -0,0 +1,8 @@
+-- As perguntas são gravadas em minúsculas pelo app; o banco passa a garantir isso,
+-- assim o chatbot usa os valores como vieram, sem normalizar a cada consulta.
+update conhecimento set pergunta = lower(pergunta) where pergunta <> lower(pergunta);
+
+alter table conhecimento
+    add constraint conhecimento_pergunta_minuscula check (pergunta = lower(pergunta));
+
+create index if not exists conhecimento_pergunta_idx on conhecimento (pergunta);
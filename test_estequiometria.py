@@ -0,0 +1,77 @@
+import pytest
+
+from estequiometria import EQUACAO_RE, balanceia_reacao, composicao
+
+
+@pytest.mark.parametrize("reacao, reagentes, produtos", [
+    ("H2 + O2 -> H2O", {"H2": 2, "O2": 1}, {"H2O": 2}),
+    ("CH4 + O2 -> CO2 + H2O", {"CH4": 1, "O2": 2}, {"CO2": 1, "H2O": 2}),
+    ("KMnO4 + HCl -> KCl + MnCl2 + H2O + Cl2",
+     {"KMnO4": 2, "HCl": 16}, {"KCl": 2, "MnCl2": 2, "H2O": 8, "Cl2": 5}),
+    ("Cu + HNO3 -> Cu(NO3)2 + NO + H2O",
+     {"Cu": 3, "HNO3": 8}, {"Cu(NO3)2": 3, "NO": 2, "H2O": 4}),
+    ("Fe4(Fe(CN)6)3 -> Fe + C + N", {"Fe4(Fe(CN)6)3": 1}, {"Fe": 7, "C": 18, "N": 18}),
+    ("Ca(OH)2 + H3PO4 -> Ca3(PO4)2 + H2O",
+     {"Ca(OH)2": 3, "H3PO4": 2}, {"Ca3(PO4)2": 1, "H2O": 6}),
+    ("K4Fe(CN)6 + KMnO4 + H2SO4 -> KHSO4 + Fe2(SO4)3 + MnSO4 + HNO3 + CO2 + H2O",
+     {"K4Fe(CN)6": 10, "KMnO4": 122, "H2SO4": 299},
+     {"KHSO4": 162, "Fe2(SO4)3": 5, "MnSO4": 122, "HNO3": 60, "CO2": 60, "H2O": 188}),
+])
+def test_balanceamentos_conhecidos(reacao, reagentes, produtos):
+    assert balanceia_reacao(reacao) == (reagentes, produtos)
+
+
+@pytest.mark.parametrize("formula, esperado", [
+    ("H2O", {"H": 2, "O": 1}),
+    ("Ca(OH)2", {"Ca": 1, "O": 2, "H": 2}),
+    ("Ca3(PO4)2", {"Ca": 3, "P": 2, "O": 8}),
+    ("K4Fe(CN)6", {"K": 4, "Fe": 1, "C": 6, "N": 6}),
+    ("Fe4(Fe(CN)6)3", {"Fe": 7, "C": 18, "N": 18}),
+    ("CH3COOH", {"C": 2, "H": 4, "O": 2}),
+])
+def test_composicao_com_parenteses(formula, esperado):
+    assert dict(composicao(formula)) == esperado
+
+
+@pytest.mark.parametrize("formula", ["", "h2o", "H2O)", "(H2O", "Ca(OH2", "H2 O", "2H2O"])
+def test_composicao_formula_invalida(formula):
+    with pytest.raises(ValueError):
+        composicao(formula)
+
+
+@pytest.mark.parametrize("reacao", [
+    "H2 + O2 -> H2O",
+    " Cu + HNO3->Cu(NO3)2 + NO + H2O ",
+    "(NH4)2SO4 + NaOH -> Na2SO4 + NH3 + H2O",
+    "Fe4(Fe(CN)6)3 -> Fe + C + N",
+])
+def test_equacao_valida(reacao):
+    assert EQUACAO_RE.match(reacao)
+
+
+@pytest.mark.parametrize("reacao", ["H2 + O2 = H2O", "H2 + -> H2O", "h2 -> H2", "H2 + O2"])
+def test_equacao_invalida(reacao):
+    assert not EQUACAO_RE.match(reacao)
+
+
+def test_reacao_sem_balanceamento():
+    with pytest.raises(ValueError, match="não pode ser balanceada$"):
+        balanceia_reacao("H2 -> O2")
+
+
+def test_reacao_sem_balanceamento_unico():
+    with pytest.raises(ValueError, match="não possui um balanceamento único"):
+        balanceia_reacao("H2 + O2 -> H2O + H2O2")
+
+
+def test_reacao_sem_coeficientes_positivos():
+    with pytest.raises(ValueError, match="coeficientes positivos"):
+        balanceia_reacao("H2 -> H2 + O2")
+
+
+@pytest.mark.parametrize("reacao", ["H2) + O2 -> H2O", "Ca(OH2 -> Ca + O + H"])
+def test_equacao_com_formula_invalida(reacao):
+    # O regex só confere a forma da equação; parênteses errados são barrados por composicao()
+    assert EQUACAO_RE.match(reacao)
+    with pytest.raises(ValueError, match="Fórmula inválida|Parênteses desbalanceados"):
+        balanceia_reacao(reacao)